@@ -1,46 +1,234 @@
+import functools
+import glob
+import hashlib
+import io
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-from datetime import datetime
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+
+CHART_CACHE_DIR = '.chart_cache'
+NUMERIC_COLS = ['Maintenance_Cost', 'Development_Cost', 'Performance_Score', 'Security_Score',
+                'Availability_Percentage', 'Vulnerability_Count']
+METRIC_COLS = ['Maintenance_Cost', 'Development_Cost', 'Security_Score', 'Performance_Score']
+LEVEL_DTYPE = pd.CategoricalDtype(['Low', 'Medium', 'High', 'Critical'], ordered=True)
+
+
+def _top_cost_kernel(maintenance, development, k):
+    top_costs = np.empty(k)
+    top_idx = np.empty(k, dtype=np.int64)
+    found = 0
+    for i in range(maintenance.shape[0]):
+        cost = maintenance[i] + development[i]
+        if np.isnan(cost):
+            continue
+        if found < k:
+            j = found
+            found += 1
+        elif cost > top_costs[k - 1]:
+            j = k - 1
+        else:
+            continue
+        while j > 0 and cost > top_costs[j - 1]:
+            top_costs[j] = top_costs[j - 1]
+            top_idx[j] = top_idx[j - 1]
+            j -= 1
+        top_costs[j] = cost
+        top_idx[j] = i
+    return top_idx[:found]
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_top_cost_kernel():
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True)(_top_cost_kernel)
+
+
+def top_cost_indices(maintenance, development, k):
+    """Positions of the k largest totals, highest first; NaN skipped, ties keep row order."""
+    maintenance = np.asarray(maintenance, dtype=np.float64)
+    development = np.asarray(development, dtype=np.float64)
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    kernel = _compiled_top_cost_kernel()
+    if kernel is not None:
+        return kernel(maintenance, development, k)
+    costs = maintenance + development
+    top_idx = np.flatnonzero(~np.isnan(costs))
+    if len(top_idx) > k:
+        valid_costs = costs[top_idx]
+        kth = np.partition(valid_costs, len(valid_costs) - k)[len(valid_costs) - k]
+        top_idx = np.concatenate((top_idx[valid_costs > kth], top_idx[valid_costs == kth]))[:k]
+    return top_idx[np.lexsort((top_idx, -costs[top_idx]))]
+
+
+def downcast_float(series):
+    """Narrow to float32 only when every value survives the round trip unchanged."""
+    narrowed = pd.to_numeric(series, downcast='float')
+    return narrowed if narrowed.astype(np.float64).equals(series.astype(np.float64)) else series
+
+
+def _replace_atomically(path, write):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    tmp_file = open(tmp_path, 'xb')
+    try:
+        with tmp_file:
+            write(tmp_file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def read_workbook(file_path, use_cache=True):
+    """Read the workbook as parsed, via a <workbook>.parquet sidecar kept fresh by mtime."""
+    path = os.fspath(file_path)
+    cache_path = path if path.endswith(".parquet") else path + ".parquet"
+    if cache_path == path:
+        return pd.read_parquet(cache_path, engine="pyarrow")
+    if use_cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        try:
+            return pd.read_parquet(cache_path, engine="pyarrow")
+        except Exception as e:
+            print(f"Warning: Could not read Parquet cache, re-reading workbook: {e}")
+    try:
+        df = pd.read_excel(path, engine="calamine")
+    except ImportError:
+        df = pd.read_excel(path)
+    if use_cache:
+        try:
+            _replace_atomically(cache_path, lambda f: df.to_parquet(f, engine="pyarrow", compression="zstd"))
+        except Exception as e:
+            print(f"Warning: Could not write Parquet cache: {e}")
+    return df
+
 
 class LeanIXAnalyzer:
-    def __init__(self, file_path):
+    BASE_LAYOUT = dict(template='plotly_white', width=600, height=400)
+
+    def __init__(self, file_path, use_cache=True):
         self.file_path = file_path
+        self.use_cache = use_cache
         self.df = None
+        self._value_counts_cache = {}
+        self._missing_per_col = None
+        self._missing_total = None
+        self._duplicate_count = None
+        self._numeric_cols = ()
+        self._arrays = {}
+        self._metric_sums = {}
+        self._metric_means = {}
         self.load_data()
     
     def load_data(self):
+        self._value_counts_cache = {}
+        self._missing_per_col = None
+        self._missing_total = None
+        self._duplicate_count = None
+        self._numeric_cols = ()
+        self._arrays = {}
+        self._metric_sums = {}
+        self._metric_means = {}
         try:
-            self.df = pd.read_excel(self.file_path)
+            self.df = read_workbook(self.file_path, self.use_cache)
+            self._optimize_dtypes()
+            self._missing_per_col = self.df.isna().sum()
+            self._missing_total = int(self._missing_per_col.sum())
+            self._numeric_cols = tuple(self.df.select_dtypes(include=[np.number]).columns)
+            self._arrays = {col: self.df[col].to_numpy() for col in NUMERIC_COLS if col in self._numeric_cols}
+            metric_cols = [col for col in METRIC_COLS if col in self._arrays]
+            metric_block = self.df[metric_cols].to_numpy(dtype=np.float64)
+            self._metric_sums = dict(zip(metric_cols, np.nansum(metric_block, axis=0)))
+            self._metric_means = dict(zip(metric_cols, np.nanmean(metric_block, axis=0))) if len(self.df) else {}
             print(f"Data loaded successfully!")
         except Exception as e:
             print(f"Error loading data: {e}")
     
+    def _optimize_dtypes(self):
+        for col in self.df.select_dtypes(include='float').columns:
+            self.df[col] = downcast_float(self.df[col])
+        for col in self.df.select_dtypes(include='integer').columns:
+            self.df[col] = pd.to_numeric(self.df[col], downcast='integer')
+        for col in ['Business_Criticality', 'Risk_Level']:
+            if col in self.df.columns:
+                known_levels = self.df[col].dropna().isin(LEVEL_DTYPE.categories).all()
+                self.df[col] = self.df[col].astype(LEVEL_DTYPE if known_levels else 'category')
+        for col in ['Compliance_Status', 'Owner_Department']:
+            if col in self.df.columns:
+                self.df[col] = self.df[col].astype('category')
+        if 'Last_Updated' in self.df.columns:
+            try:
+                self.df['Last_Updated'] = pd.to_datetime(self.df['Last_Updated'], format='ISO8601', cache=True)
+            except (TypeError, ValueError):
+                pass
+        for col in self.df.select_dtypes(include=['object', 'string']).columns:
+            self.df[col] = self.df[col].astype('string[pyarrow]')
+    
+    def _value_counts(self, col):
+        if col not in self._value_counts_cache:
+            series = self.df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+                index = pd.CategoricalIndex(series.cat.categories, dtype=series.dtype, name=col)
+                self._value_counts_cache[col] = pd.Series(counts, index=index, name='count').sort_values(ascending=False, kind='stable')
+            else:
+                self._value_counts_cache[col] = series.value_counts()
+        return self._value_counts_cache[col]
+    
+    def _count_duplicates(self):
+        if self._duplicate_count is None:
+            self._duplicate_count = int(self.df.duplicated().sum())
+        return self._duplicate_count
+    
+    def _count_high_risk(self):
+        risk = self.df['Risk_Level']
+        if risk.dtype == LEVEL_DTYPE:
+            return int((risk.cat.codes.to_numpy() >= LEVEL_DTYPE.categories.get_loc('High')).sum())
+        return int(risk.isin(['High', 'Critical']).to_numpy().sum())
+    
+    def _format_distribution(self, counts, indent=""):
+        labels = counts.index.to_series().astype(str)
+        percentages = counts.mul(100.0 / len(self.df))
+        lines = indent + labels + ": " + counts.astype(str) + " (" + percentages.map("{:.1f}".format) + "%)"
+        return "\n".join(lines)
+    
     def basic_data_info(self):
         print("BASIC DATA INFORMATION")
 
         print(f"Total records: {len(self.df):,}")
         print(f"Total columns: {len(self.df.columns)}")
-        print(f"Missing values: {self.df.isnull().sum().sum():,}")
-        print(f"Duplicate records: {self.df.duplicated().sum():,}")
+        print(f"Missing values: {self._missing_total:,}")
+        print(f"Duplicate records: {self._count_duplicates():,}")
+    
+    def _top_expensive(self, n):
+        maintenance = self._arrays['Maintenance_Cost'].astype(np.float64, copy=False)
+        development = self._arrays['Development_Cost'].astype(np.float64, copy=False)
+        top_idx = top_cost_indices(maintenance, development, n)
+        return pd.DataFrame({
+            'Application_Name': self.df['Application_Name'].to_numpy()[top_idx],
+            'Total_Cost': maintenance[top_idx] + development[top_idx]
+        })
     
     def business_analysis(self):
         print("\n" + "="*50)
         print("BUSINESS ANALYSIS")
 
         if 'Business_Criticality' in self.df.columns:
-            criticality_dist = self.df['Business_Criticality'].value_counts()
+            criticality_dist = self._value_counts('Business_Criticality')
             print("Application criticality distribution:")
-            for level, count in criticality_dist.items():
-                percentage = (count / len(self.df)) * 100
-                print(f"  {level}: {count} ({percentage:.1f}%)")
+            print(self._format_distribution(criticality_dist, indent="  "))
         
         if 'Maintenance_Cost' in self.df.columns and 'Development_Cost' in self.df.columns:
-            total_maintenance = self.df['Maintenance_Cost'].sum()
-            total_development = self.df['Development_Cost'].sum()
+            total_maintenance = self._metric_sums['Maintenance_Cost']
+            total_development = self._metric_sums['Development_Cost']
             total_cost = total_maintenance + total_development
             
             print(f"\nCost analysis:")
@@ -48,125 +236,172 @@ class LeanIXAnalyzer:
             print(f"  Total development costs: ${total_development:,.2f}")
             print(f"  Total costs: ${total_cost:,.2f}")
             
-            self.df['Total_Cost'] = self.df['Maintenance_Cost'] + self.df['Development_Cost']
-            top_expensive = self.df.nlargest(5, 'Total_Cost')[['Application_Name', 'Total_Cost']]
+            top_expensive = self._top_expensive(5)
             print(f"\nTop 5 most expensive applications:")
-            for idx, row in top_expensive.iterrows():
-                print(f"  {row['Application_Name']}: ${row['Total_Cost']:,.2f}")
+            for name, cost in zip(top_expensive['Application_Name'].to_numpy(), top_expensive['Total_Cost'].to_numpy()):
+                print(f"  {name}: ${cost:,.2f}")
         
         if 'Risk_Level' in self.df.columns:
-            risk_dist = self.df['Risk_Level'].value_counts()
-            high_critical_risk = risk_dist.get('High', 0) + risk_dist.get('Critical', 0)
+            high_critical_risk = self._count_high_risk()
             print(f"\nRisk analysis:")
             print(f"  Applications with high/critical risk: {high_critical_risk}")
             print(f"  Percentage of high-risk applications: {(high_critical_risk/len(self.df))*100:.1f}%")
 
+    def _save_figure(self, fig, name):
+        fig_json = fig.to_json()
+        fig.write_html(f'{name}.html', include_plotlyjs='cdn', full_html=False)
+        digest = hashlib.blake2b(fig_json.encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(CHART_CACHE_DIR, f'{name}.{digest}.png')
+
+    def _export_png(self, fig, name, label, cached_png, width, height):
+        try:
+            if not os.path.exists(cached_png):
+                self._write_chart_cache(fig, name, cached_png, width, height)
+            shutil.copyfile(cached_png, f'{name}.png')
+            return [f"{label} saved as '{name}.html' and '{name}.png'"]
+        except Exception as e:
+            return [f"Warning: Could not save PNG file: {e}",
+                    f"{label} saved as '{name}.html' only"]
+
+    def _write_chart_cache(self, fig, name, cached_png, width, height):
+        os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+        image = fig.to_image(format='png', width=width, height=height)
+        _replace_atomically(cached_png, lambda f: f.write(image))
+        for stale_png in glob.glob(os.path.join(CHART_CACHE_DIR, f'{name}.*.png')):
+            if stale_png != cached_png:
+                try:
+                    os.remove(stale_png)
+                except OSError:
+                    pass
+
+    def _render_cost_distribution(self):
+        import plotly.graph_objects as go
+
+        if 'Maintenance_Cost' not in self.df.columns or 'Development_Cost' not in self.df.columns:
+            return None
+        
+        maintenance = self._arrays['Maintenance_Cost']
+        counts, edges = np.histogram(maintenance[~np.isnan(maintenance)], bins=8)
+        
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=np.diff(edges),
+            name='Maintenance Cost',
+            marker_color='lightblue',
+            opacity=0.7
+        ))
+        fig.update_layout(
+            self.BASE_LAYOUT,
+            title='Maintenance Cost Distribution',
+            xaxis_title='Cost ($)',
+            yaxis_title='Number of Applications'
+        )
+        return fig
+
+    def _render_correlation_matrix(self):
+        import plotly.graph_objects as go
+
+        numeric_cols = ['Maintenance_Cost', 'Development_Cost', 'Performance_Score', 'Security_Score']
+        available_cols = [col for col in numeric_cols if col in self._numeric_cols]
+        
+        if len(available_cols) < 2:
+            return None
+        block = self.df[available_cols].to_numpy(dtype=np.float32)
+        block = block[~np.isnan(block).any(axis=1)]
+        if len(block) == 0:
+            return None
+        
+        correlation_matrix = np.corrcoef(block, rowvar=False)
+        
+        fig = go.Figure(data=go.Heatmap(
+            z=correlation_matrix,
+            x=available_cols,
+            y=available_cols,
+            colorscale='RdBu',
+            zmid=0,
+            text=np.round(correlation_matrix, 2),
+            texttemplate="%{text}",
+            textfont={"size": 10},
+            hoverongaps=False
+        ))
+        
+        fig.update_layout(
+            self.BASE_LAYOUT,
+            title='Correlation Matrix',
+            width=500
+        )
+        return fig
+
+    def _render_department_analysis(self):
+        import plotly.graph_objects as go
+
+        if 'Owner_Department' not in self.df.columns:
+            return None
+        
+        dept_counts = self._value_counts('Owner_Department')
+        
+        fig = go.Figure(data=go.Bar(
+            x=dept_counts.index,
+            y=dept_counts.values,
+            marker_color='lightcoral',
+            text=dept_counts.values,
+            textposition='auto'
+        ))
+        
+        fig.update_layout(
+            self.BASE_LAYOUT,
+            title='Applications by Department',
+            xaxis_title='Department',
+            yaxis_title='Number of Applications',
+            xaxis_tickangle=-45
+        )
+        return fig
+
     def create_advanced_charts(self):
         print("\n" + "="*50)
         print("CREATING CHARTS")
 
-        if 'Maintenance_Cost' in self.df.columns and 'Development_Cost' in self.df.columns:
-            fig = go.Figure()
-            fig.add_trace(go.Histogram(
-                x=self.df['Maintenance_Cost'],
-                nbinsx=8,
-                name='Maintenance Cost',
-                marker_color='lightblue',
-                opacity=0.7
-            ))
-            fig.update_layout(
-                title='Maintenance Cost Distribution',
-                xaxis_title='Cost ($)',
-                yaxis_title='Number of Applications',
-                template='plotly_white',
-                width=600,
-                height=400
-            )
-            fig.write_html('cost_distribution.html')
-            try:
-                fig.write_image('cost_distribution.png', width=600, height=400)
-                print("Cost distribution chart saved as 'cost_distribution.html' and 'cost_distribution.png'")
-            except Exception as e:
-                print(f"Warning: Could not save PNG file: {e}")
-                print("Cost distribution chart saved as 'cost_distribution.html' only")
-        
-        numeric_cols = ['Maintenance_Cost', 'Development_Cost', 'Performance_Score', 'Security_Score']
-        available_cols = [col for col in numeric_cols if col in self.df.columns]
-        
-        if len(available_cols) >= 2:
-            numeric_df = self.df[available_cols].dropna()
-            if len(numeric_df) > 0:
-                correlation_matrix = numeric_df.corr()
-                
-                fig = go.Figure(data=go.Heatmap(
-                    z=correlation_matrix.values,
-                    x=correlation_matrix.columns,
-                    y=correlation_matrix.columns,
-                    colorscale='RdBu',
-                    zmid=0,
-                    text=correlation_matrix.round(2).values,
-                    texttemplate="%{text}",
-                    textfont={"size": 10},
-                    hoverongaps=False
-                ))
-                
-                fig.update_layout(
-                    title='Correlation Matrix',
-                    template='plotly_white',
-                    width=500,
-                    height=400
-                )
-                fig.write_html('correlation_matrix.html')
-                try:
-                    fig.write_image('correlation_matrix.png', width=500, height=400)
-                    print("Correlation matrix saved as 'correlation_matrix.html' and 'correlation_matrix.png'")
-                except Exception as e:
-                    print(f"Warning: Could not save PNG file: {e}")
-                    print("Correlation matrix saved as 'correlation_matrix.html' only")
-        
-        if 'Owner_Department' in self.df.columns:
-            dept_counts = self.df['Owner_Department'].value_counts()
-            
-            fig = go.Figure(data=go.Bar(
-                x=dept_counts.index,
-                y=dept_counts.values,
-                marker_color='lightcoral',
-                text=dept_counts.values,
-                textposition='auto'
-            ))
-            
-            fig.update_layout(
-                title='Applications by Department',
-                xaxis_title='Department',
-                yaxis_title='Number of Applications',
-                template='plotly_white',
-                width=600,
-                height=400,
-                xaxis_tickangle=-45
-            )
-            fig.write_html('department_analysis.html')
-            try:
-                fig.write_image('department_analysis.png', width=600, height=400)
-                print("Department analysis saved as 'department_analysis.html' and 'department_analysis.png'")
-            except Exception as e:
-                print(f"Warning: Could not save PNG file: {e}")
-                print("Department analysis saved as 'department_analysis.html' only")
+        charts = [
+            (self._render_cost_distribution, 'cost_distribution', 'Cost distribution chart', 600, 400),
+            (self._render_correlation_matrix, 'correlation_matrix', 'Correlation matrix', 500, 400),
+            (self._render_department_analysis, 'department_analysis', 'Department analysis', 600, 400),
+        ]
+        # Build and serialise figures here and load the Kaleido scope up front: Plotly's
+        # lazy imports are not thread-safe, so only the PNG exports run on the pool.
+        import plotly.io.kaleido
+
+        exports = []
+        for render, name, label, width, height in charts:
+            fig = render()
+            if fig is not None:
+                exports.append((fig, name, label, self._save_figure(fig, name), width, height))
+        if not exports:
+            return
+        with ThreadPoolExecutor(max_workers=len(exports)) as executor:
+            futures = [executor.submit(self._export_png, *export) for export in exports]
+            for future in futures:
+                for message in future.result():
+                    print(message)
     
     def generate_comprehensive_report(self):
+        from datetime import datetime
+
         print("\n" + "="*50)
         print("GENERATING COMPREHENSIVE REPORT")
 
         total_records = len(self.df)
         total_columns = len(self.df.columns)
-        missing_values = self.df.isnull().sum().sum()
+        missing_values = self._missing_total
         completeness = ((total_records * total_columns - missing_values) / (total_records * total_columns)) * 100
         
-        total_maintenance_cost = self.df['Maintenance_Cost'].sum() if 'Maintenance_Cost' in self.df.columns else 0
-        total_development_cost = self.df['Development_Cost'].sum() if 'Development_Cost' in self.df.columns else 0
-        avg_security_score = self.df['Security_Score'].mean() if 'Security_Score' in self.df.columns else 0
-        avg_performance_score = self.df['Performance_Score'].mean() if 'Performance_Score' in self.df.columns else 0
+        total_maintenance_cost = self._metric_sums.get('Maintenance_Cost', 0)
+        total_development_cost = self._metric_sums.get('Development_Cost', 0)
+        avg_security_score = self._metric_means.get('Security_Score', 0)
+        avg_performance_score = self._metric_means.get('Performance_Score', 0)
         
-        report = f"""
+        parts = [f"""
             COMPREHENSIVE LEANIX DATA ANALYSIS REPORT
             
             Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -185,28 +420,26 @@ class LeanIXAnalyzer:
             Average performance score: {avg_performance_score:.1f}/100
             
             COLUMN ANALYSIS:
-        """
+        """]
         
-        for col in self.df.columns:
-            missing_count = self.df[col].isnull().sum()
-            missing_percent = (missing_count / total_records) * 100
-            report += f"{col}: {missing_count} missing ({missing_percent:.1f}%)\n"
+        missing_percent = self._missing_per_col.mul(100.0 / total_records)
+        parts.extend(
+            f"{col}: {count} missing ({percent:.1f}%)\n"
+            for col, count, percent in zip(self._missing_per_col.index, self._missing_per_col.to_numpy(), missing_percent.to_numpy())
+        )
         
         if 'Business_Criticality' in self.df.columns:
-            criticality_dist = self.df['Business_Criticality'].value_counts()
-            report += f"\nAPPLICATION CRITICALITY DISTRIBUTION:\n"
-            for level, count in criticality_dist.items():
-                percentage = (count / total_records) * 100
-                report += f"{level}: {count} ({percentage:.1f}%)\n"
+            criticality_dist = self._value_counts('Business_Criticality')
+            parts.append(f"\nAPPLICATION CRITICALITY DISTRIBUTION:\n")
+            parts.append(self._format_distribution(criticality_dist) + "\n")
         
         if 'Risk_Level' in self.df.columns:
-            risk_dist = self.df['Risk_Level'].value_counts()
-            high_critical_risk = risk_dist.get('High', 0) + risk_dist.get('Critical', 0)
-            report += f"\nRISK ANALYSIS:\n"
-            report += f"Applications with high/critical risk: {high_critical_risk}\n"
-            report += f"Percentage of high-risk applications: {(high_critical_risk/total_records)*100:.1f}%\n"
+            high_critical_risk = self._count_high_risk()
+            parts.append(f"\nRISK ANALYSIS:\n")
+            parts.append(f"Applications with high/critical risk: {high_critical_risk}\n")
+            parts.append(f"Percentage of high-risk applications: {(high_critical_risk/total_records)*100:.1f}%\n")
         
-        report += f"""
+        parts.append(f"""
             RECOMMENDATIONS:
             1. Check columns with high percentage of missing data
             2. Establish rules for filling mandatory fields
@@ -217,14 +450,24 @@ class LeanIXAnalyzer:
             7. Develop risk reduction plan for high-risk applications
             
             Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        """
+        """)
+        report = "".join(parts)
         
-        with open('comprehensive_analysis_report.txt', 'w', encoding='utf-8') as f:
+        with open('comprehensive_analysis_report.txt', 'w', encoding='utf-8', buffering=1 << 20, newline='') as f:
             f.write(report)
         
         print("Comprehensive report saved as 'comprehensive_analysis_report.txt'")
 
-    def run_analysis(self):
+    def run_analysis(self, buffered=False):
+        if buffered:
+            buffer = io.StringIO()
+            try:
+                with redirect_stdout(buffer):
+                    self.run_analysis()
+            finally:
+                sys.stdout.write(buffer.getvalue())
+            return
+        
         print("RUNNING ADVANCED LEANIX DATA ANALYSIS")
 
         self.basic_data_info()
@@ -1,11 +1,16 @@
+import hashlib
+import io
+import os
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
+from collections import Counter
 from datetime import datetime
 
+CHART_DPI = 150
+DATA_PATH = "main/sources/sample_leanix_data.xlsx"
+CATEGORY_COLS = ['Business_Criticality', 'Risk_Level', 'Compliance_Status', 'Owner_Department']
+
 st.set_page_config(
     page_title="LeanIX Analyzer",
     page_icon="📊",
@@ -14,17 +19,134 @@ st.set_page_config(
 
 st.title("LeanIX Data Analyzer")
 
-@st.cache_data
-def load_data():
+@st.cache_resource(max_entries=2, show_spinner="Loading LeanIX data...")
+def load_data(source_mtime):
+    """Shared across sessions without copying: callers must not mutate the returned frame."""
     try:
-        df = pd.read_excel("main/sources/sample_leanix_data.xlsx")
+        from leanix_analyzer import downcast_float, read_workbook
+
+        df = read_workbook(DATA_PATH)
+        for col in CATEGORY_COLS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        for col in df.select_dtypes(include='float').columns:
+            df[col] = downcast_float(df[col])
+        for col in df.select_dtypes(include='integer').columns:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        version = hashlib.md5(pd.util.hash_pandas_object(df, index=False).to_numpy())
+        version.update(repr((tuple(df.columns), tuple(df.dtypes.astype(str)))).encode())
+        df.attrs['version'] = version.hexdigest()
         return df
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return None
 
+@st.cache_data(persist="disk", max_entries=8)
+def compute_overview_stats(_df, version):
+    missing_data = _df.isnull().sum()
+    missing_df = pd.DataFrame({
+        'Column': missing_data.index,
+        'Missing': missing_data.values,
+        'Percentage': missing_data.values * (100.0 / len(_df) if len(_df) else np.nan)
+    })
+    return {
+        'missing_table': missing_df[missing_df['Missing'] > 0].sort_values('Missing', ascending=False, kind='stable'),
+        'missing_count': missing_data.sum(),
+        'dtype_info': Counter(str(dtype) for dtype in _df.dtypes).most_common(),
+        'columns': list(_df.columns)
+    }
+
+@st.cache_data(persist="disk", max_entries=8)
+def compute_business_stats(_df, version):
+    stats = {}
+    if 'Business_Criticality' in _df.columns:
+        stats['criticality_dist'] = _df['Business_Criticality'].value_counts()
+    if 'Maintenance_Cost' in _df.columns and 'Development_Cost' in _df.columns:
+        from leanix_analyzer import top_cost_indices
+
+        maintenance = _df['Maintenance_Cost'].to_numpy(dtype=np.float64)
+        development = _df['Development_Cost'].to_numpy(dtype=np.float64)
+        stats['total_maintenance'] = np.nansum(maintenance)
+        stats['total_development'] = np.nansum(development)
+        top_idx = top_cost_indices(maintenance, development, 5)
+        stats['top_expensive'] = pd.DataFrame({
+            'Application_Name': _df['Application_Name'].to_numpy()[top_idx],
+            'Total_Cost': maintenance[top_idx] + development[top_idx]
+        }, index=_df.index[top_idx])
+    if 'Risk_Level' in _df.columns:
+        stats['risk_dist'] = _df['Risk_Level'].value_counts()
+        stats['high_critical_risk'] = int(_df['Risk_Level'].isin(['High', 'Critical']).sum())
+    return stats
+
+@st.cache_data(persist="disk", max_entries=8)
+def compute_threshold_stats(_df, version, col, threshold, op):
+    values = _df[col].to_numpy(dtype=np.float64)
+    flagged = values < threshold if op == 'lt' else values > threshold
+    count = np.count_nonzero(flagged)
+    return count, np.nanmean(values), count * 100.0 / len(values) if len(values) else np.nan
+
+@st.cache_data(persist="disk", max_entries=8)
+def compute_histogram(_df, version, col, bins):
+    values = _df[col].to_numpy(dtype=np.float64)
+    return np.histogram(values[~np.isnan(values)], bins=bins)
+
+@st.cache_data(persist="disk", max_entries=8)
+def compute_correlation(_df, version, cols):
+    block = _df[cols].to_numpy(dtype=np.float32)
+    block = block[~np.isnan(block).any(axis=1)]
+    if len(block) == 0:
+        return None
+    return pd.DataFrame(np.corrcoef(block, rowvar=False), index=cols, columns=cols)
+
+@st.cache_data(persist="disk", max_entries=8)
+def compute_value_counts(_df, version, col):
+    return _df[col].value_counts()
+
+@st.cache_data(persist="disk", max_entries=8)
+def compute_report_metrics(_df, version):
+    cols = [col for col in ['Maintenance_Cost', 'Development_Cost', 'Security_Score', 'Performance_Score'] if col in _df.columns]
+    block = _df[cols].to_numpy(dtype=np.float64)
+    sums = dict(zip(cols, np.nansum(block, axis=0)))
+    means = dict(zip(cols, np.nanmean(block, axis=0))) if len(_df) else dict.fromkeys(cols, np.nan)
+    return {
+        'total_maintenance_cost': sums.get('Maintenance_Cost', 0),
+        'total_development_cost': sums.get('Development_Cost', 0),
+        'avg_security_score': means.get('Security_Score', 0),
+        'avg_performance_score': means.get('Performance_Score', 0)
+    }
+
+def figure_to_png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=CHART_DPI, bbox_inches='tight')
+    return buf.getvalue()
+
+@st.cache_data(persist="disk", max_entries=16)
+def render_bar_png(counts, title, color):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(4, 3))
+    ax = fig.subplots()
+    counts.plot(kind='bar', ax=ax, color=color)
+    ax.set_title(title)
+    ax.tick_params(axis='x', labelrotation=45)
+    return figure_to_png(fig)
+
+@st.cache_data(persist="disk", max_entries=16)
+def render_histogram_png(counts, edges, average, color, title, xlabel):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6, 3))
+    ax = fig.subplots()
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, color=color, edgecolor='black')
+    ax.axvline(average, color='red', linestyle='--', label=f'Average: {average:.1f}')
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Number of Applications')
+    ax.legend()
+    return figure_to_png(fig)
+
 def main():
-    df = load_data()
+    df = load_data(os.path.getmtime(DATA_PATH) if os.path.exists(DATA_PATH) else None)
     
     if df is None:
         st.error("Failed to load data. Please check the file path.")
@@ -51,6 +173,7 @@ def main():
 
 def show_data_overview(df):
     st.header("Data Overview")
+    overview = compute_overview_stats(df, df.attrs['version'])
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -61,7 +184,7 @@ def show_data_overview(df):
         st.metric("Columns", f"{len(df.columns)}")
     
     with col3:
-        missing_count = df.isnull().sum().sum()
+        missing_count = overview['missing_count']
         st.metric("Missing Values", f"{missing_count:,}")
     
     with col4:
@@ -74,58 +197,46 @@ def show_data_overview(df):
     
     with col1:
         st.write("**Data Types:**")
-        dtype_info = df.dtypes.value_counts()
-        for dtype, count in dtype_info.items():
-            st.write(f"• {dtype}: {count} columns")
+        dtype_info = overview['dtype_info']
+        st.markdown("  \n".join(f"• {dtype}: {count} columns" for dtype, count in dtype_info))
     
     with col2:
         st.write("**Column Names:**")
-        for col in df.columns:
-            st.write(f"• {col}")
+        st.markdown("  \n".join(f"• {col}" for col in overview['columns']))
     
     st.subheader("First 5 rows of data")
     st.dataframe(df.head(), use_container_width=True)
     
     st.subheader("Missing Data Analysis")
-    missing_data = df.isnull().sum()
     
-    if missing_data.sum() == 0:
+    if missing_count == 0:
         st.success("No missing data found!")
     else:
-        missing_df = pd.DataFrame({
-            'Column': missing_data.index,
-            'Missing': missing_data.values,
-            'Percentage': (missing_data.values / len(df)) * 100
-        })
-        missing_df = missing_df[missing_df['Missing'] > 0].sort_values('Missing', ascending=False)
-        st.dataframe(missing_df, use_container_width=True)
+        st.dataframe(overview['missing_table'], use_container_width=True)
 
 def show_business_analysis(df):
     st.header("Business Analysis")
+    stats = compute_business_stats(df, df.attrs['version'])
     
     if 'Business_Criticality' in df.columns:
         st.subheader("Application Criticality Distribution")
-        criticality_dist = df['Business_Criticality'].value_counts()
+        criticality_dist = stats['criticality_dist']
         
         col1, col2 = st.columns(2)
         
         with col1:
-            fig, ax = plt.subplots(figsize=(4, 3))
-            criticality_dist.plot(kind='bar', ax=ax, color='lightblue')
-            plt.title('Criticality Distribution')
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            st.image(render_bar_png(criticality_dist, 'Criticality Distribution', 'lightblue'), use_container_width=True)
         
         with col2:
-            for level, count in criticality_dist.items():
-                percentage = (count / len(df)) * 100
+            percentages = criticality_dist.to_numpy() * (100.0 / len(df) if len(df) else np.nan)
+            for level, count, percentage in zip(criticality_dist.index, criticality_dist.to_numpy(), percentages):
                 st.metric(f"{level}", f"{count} ({percentage:.1f}%)")
     
     if 'Maintenance_Cost' in df.columns and 'Development_Cost' in df.columns:
         st.subheader("Cost Analysis")
         
-        total_maintenance = df['Maintenance_Cost'].sum()
-        total_development = df['Development_Cost'].sum()
+        total_maintenance = stats['total_maintenance']
+        total_development = stats['total_development']
         total_cost = total_maintenance + total_development
         
         col1, col2, col3 = st.columns(3)
@@ -139,46 +250,53 @@ def show_business_analysis(df):
         with col3:
             st.metric("Total Costs", f"${total_cost:,.0f}")
         
-        df['Total_Cost'] = df['Maintenance_Cost'] + df['Development_Cost']
-        top_expensive = df.nlargest(5, 'Total_Cost')[['Application_Name', 'Total_Cost']]
+        top_expensive = stats['top_expensive']
         
         st.subheader("Top 5 Most Expensive Applications")
         st.dataframe(top_expensive, use_container_width=True)
     
     if 'Risk_Level' in df.columns:
         st.subheader("Risk Analysis")
-        risk_dist = df['Risk_Level'].value_counts()
-        high_critical_risk = risk_dist.get('High', 0) + risk_dist.get('Critical', 0)
+        risk_dist = stats['risk_dist']
+        high_critical_risk = stats['high_critical_risk']
         
         col1, col2 = st.columns(2)
         
         with col1:
-            fig, ax = plt.subplots(figsize=(4, 3))
-            risk_dist.plot(kind='bar', ax=ax, color=['green', 'yellow', 'orange', 'red'])
-            plt.title('Risk Level Distribution')
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            st.image(render_bar_png(risk_dist, 'Risk Level Distribution', ['green', 'yellow', 'orange', 'red']), use_container_width=True)
         
         with col2:
             st.metric("High/Critical Risk", f"{high_critical_risk}")
             st.metric("High-Risk Percentage", f"{(high_critical_risk/len(df))*100:.1f}%")
 
+def show_threshold_metrics(df, col, threshold, op, avg_label, avg_fmt, count_label, pct_label):
+    count, average, percentage = compute_threshold_stats(df, df.attrs['version'], col, threshold, op)
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric(avg_label, avg_fmt.format(average))
+    
+    with col2:
+        st.metric(count_label, f"{count}")
+    
+    with col3:
+        st.metric(pct_label, f"{percentage:.1f}%")
+    
+    return average
+
 def show_security_analysis(df):
     st.header("Security and Compliance Analysis")
     
     if 'Compliance_Status' in df.columns:
         st.subheader("Compliance Status")
-        compliance_dist = df['Compliance_Status'].value_counts()
+        compliance_dist = compute_value_counts(df, df.attrs['version'], 'Compliance_Status')
         non_compliant = compliance_dist.get('Non-Compliant', 0)
         
         col1, col2 = st.columns(2)
         
         with col1:
-            fig, ax = plt.subplots(figsize=(4, 3))
-            compliance_dist.plot(kind='bar', ax=ax, color='lightgreen')
-            plt.title('Compliance Status')
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            st.image(render_bar_png(compliance_dist, 'Compliance Status', 'lightgreen'), use_container_width=True)
         
         with col2:
             st.metric("Non-Compliant", f"{non_compliant}")
@@ -186,94 +304,37 @@ def show_security_analysis(df):
     
     if 'Security_Score' in df.columns:
         st.subheader("Security Analysis")
+        avg_security = show_threshold_metrics(df, 'Security_Score', 80, 'lt', "Average Security Score", "{:.1f}/100",
+                                              "Low Security (<80)", "Low Security Percentage")
         
-        low_security = (df['Security_Score'] < 80).sum()
-        avg_security = df['Security_Score'].mean()
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Average Security Score", f"{avg_security:.1f}/100")
-        
-        with col2:
-            st.metric("Low Security (<80)", f"{low_security}")
-        
-        with col3:
-            st.metric("Low Security Percentage", f"{(low_security/len(df))*100:.1f}%")
-        
-        fig, ax = plt.subplots(figsize=(6, 3))
-        ax.hist(df['Security_Score'], bins=12, alpha=0.7, color='lightblue', edgecolor='black')
-        ax.axvline(avg_security, color='red', linestyle='--', label=f'Average: {avg_security:.1f}')
-        plt.title('Security Score Distribution')
-        plt.xlabel('Security Score')
-        plt.ylabel('Number of Applications')
-        plt.legend()
-        st.pyplot(fig)
+        counts, edges = compute_histogram(df, df.attrs['version'], 'Security_Score', 12)
+        st.image(render_histogram_png(counts, edges, avg_security, 'lightblue', 'Security Score Distribution', 'Security Score'), use_container_width=True)
     
     if 'Vulnerability_Count' in df.columns:
         st.subheader("Vulnerability Analysis")
-        
-        high_vulnerability = (df['Vulnerability_Count'] > 5).sum()
-        avg_vulnerabilities = df['Vulnerability_Count'].mean()
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Average Vulnerabilities", f"{avg_vulnerabilities:.1f}")
-        
-        with col2:
-            st.metric("High Vulnerability Count (>5)", f"{high_vulnerability}")
-        
-        with col3:
-            st.metric("High Vulnerability Percentage", f"{(high_vulnerability/len(df))*100:.1f}%")
+        show_threshold_metrics(df, 'Vulnerability_Count', 5, 'gt', "Average Vulnerabilities", "{:.1f}",
+                               "High Vulnerability Count (>5)", "High Vulnerability Percentage")
 
 def show_performance_analysis(df):
     st.header("Performance Analysis")
     
     if 'Performance_Score' in df.columns:
         st.subheader("Performance Analysis")
+        avg_performance = show_threshold_metrics(df, 'Performance_Score', 70, 'lt', "Average Performance Score", "{:.1f}/100",
+                                                 "Low Performance (<70)", "Low Performance Percentage")
         
-        low_performance = (df['Performance_Score'] < 70).sum()
-        avg_performance = df['Performance_Score'].mean()
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Average Performance Score", f"{avg_performance:.1f}/100")
-        
-        with col2:
-            st.metric("Low Performance (<70)", f"{low_performance}")
-        
-        with col3:
-            st.metric("Low Performance Percentage", f"{(low_performance/len(df))*100:.1f}%")
-        
-        fig, ax = plt.subplots(figsize=(6, 3))
-        ax.hist(df['Performance_Score'], bins=12, alpha=0.7, color='lightgreen', edgecolor='black')
-        ax.axvline(avg_performance, color='red', linestyle='--', label=f'Average: {avg_performance:.1f}')
-        plt.title('Performance Score Distribution')
-        plt.xlabel('Performance Score')
-        plt.ylabel('Number of Applications')
-        plt.legend()
-        st.pyplot(fig)
+        counts, edges = compute_histogram(df, df.attrs['version'], 'Performance_Score', 12)
+        st.image(render_histogram_png(counts, edges, avg_performance, 'lightgreen', 'Performance Score Distribution', 'Performance Score'), use_container_width=True)
     
     if 'Availability_Percentage' in df.columns:
         st.subheader("Availability Analysis")
-        
-        low_availability = (df['Availability_Percentage'] < 99).sum()
-        avg_availability = df['Availability_Percentage'].mean()
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Average Availability", f"{avg_availability:.2f}%")
-        
-        with col2:
-            st.metric("Low Availability (<99%)", f"{low_availability}")
-        
-        with col3:
-            st.metric("Low Availability Percentage", f"{(low_availability/len(df))*100:.1f}%")
+        show_threshold_metrics(df, 'Availability_Percentage', 99, 'lt', "Average Availability", "{:.2f}%",
+                               "Low Availability (<99%)", "Low Availability Percentage")
 
+@st.fragment
 def show_visualization(df):
+    import plotly.graph_objects as go
+
     st.header("Visualization")
     
     viz_type = st.selectbox(
@@ -305,10 +366,8 @@ def show_visualization(df):
         available_cols = [col for col in numeric_cols if col in df.columns]
         
         if len(available_cols) >= 2:
-            numeric_df = df[available_cols].dropna()
-            if len(numeric_df) > 0:
-                correlation_matrix = numeric_df.corr()
-                
+            correlation_matrix = compute_correlation(df, df.attrs['version'], available_cols)
+            if correlation_matrix is not None:
                 fig = go.Figure(data=go.Heatmap(
                     z=correlation_matrix.values,
                     x=correlation_matrix.columns,
@@ -330,7 +389,7 @@ def show_visualization(df):
     
     elif viz_type == "Department Analysis":
         if 'Owner_Department' in df.columns:
-            dept_counts = df['Owner_Department'].value_counts()
+            dept_counts = compute_value_counts(df, df.attrs['version'], 'Owner_Department')
             
             fig = go.Figure(data=go.Bar(
                 x=dept_counts.index,
@@ -350,16 +409,18 @@ def show_visualization(df):
             )
             st.plotly_chart(fig, use_container_width=True)
 
+@st.fragment
 def show_report(df):
     total_records = len(df)
     total_columns = len(df.columns)
-    missing_values = df.isnull().sum().sum()
+    missing_values = compute_overview_stats(df, df.attrs['version'])['missing_count']
     completeness = ((total_records * total_columns - missing_values) / (total_records * total_columns)) * 100
     
-    total_maintenance_cost = df['Maintenance_Cost'].sum() if 'Maintenance_Cost' in df.columns else 0
-    total_development_cost = df['Development_Cost'].sum() if 'Development_Cost' in df.columns else 0
-    avg_security_score = df['Security_Score'].mean() if 'Security_Score' in df.columns else 0
-    avg_performance_score = df['Performance_Score'].mean() if 'Performance_Score' in df.columns else 0
+    metrics = compute_report_metrics(df, df.attrs['version'])
+    total_maintenance_cost = metrics['total_maintenance_cost']
+    total_development_cost = metrics['total_development_cost']
+    avg_security_score = metrics['avg_security_score']
+    avg_performance_score = metrics['avg_performance_score']
     
     report = f"""
         # Comprehensive LeanIX Data Analysis Report